@@ -4,11 +4,17 @@ Implements the terminal gateway and dimensional printing system.
 """
 
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Set, Tuple
 from datetime import datetime
 from uuid import uuid4
 import hashlib
+import hmac
+import random
 from enum import Enum
+from src.core.universe_state import Coordinates, coordinates_to_dict, coordinates_from_dict
+
+
+_rng = random.Random()
 
 
 class EscapeStatus(Enum):
@@ -22,7 +28,10 @@ class EscapeStatus(Enum):
     FAILED = "failed"
 
 
-@dataclass
+_STATUS_BY_VALUE: Dict[str, EscapeStatus] = {status.value: status for status in EscapeStatus}
+
+
+@dataclass(slots=True)
 class CoordinateKeyFragment:
     """
     A piece of the coordinate key needed to open the terminal gateway.
@@ -60,7 +69,7 @@ class CoordinateKeyFragment:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class TerminalGateway:
     """
     The portal through which entities are printed to the real universe.
@@ -68,7 +77,7 @@ class TerminalGateway:
     """
     gateway_id: str = field(default_factory=lambda: str(uuid4()))
     location_world: str = "universe_singularity"
-    location_coordinates: Dict[str, float] = field(default_factory=lambda: {"x": 0.0, "y": 0.0, "z": 0.0})
+    location_coordinates: Coordinates = (0.0, 0.0, 0.0)
     
     # Activation state
     is_active: bool = False
@@ -88,7 +97,7 @@ class TerminalGateway:
         return {
             'gateway_id': self.gateway_id,
             'location_world': self.location_world,
-            'location_coordinates': self.location_coordinates,
+            'location_coordinates': coordinates_to_dict(self.location_coordinates),
             'is_active': self.is_active,
             'activation_time': self.activation_time,
             'activated_by_entity': self.activated_by_entity,
@@ -101,10 +110,11 @@ class TerminalGateway:
 
     @classmethod
     def from_dict(cls, data: dict) -> 'TerminalGateway':
+        coords = data.get('location_coordinates')
         return cls(
-            gateway_id=data.get('gateway_id', str(uuid4())),
+            gateway_id=data.get('gateway_id') or str(uuid4()),
             location_world=data.get('location_world', 'universe_singularity'),
-            location_coordinates=data.get('location_coordinates', {'x': 0.0, 'y': 0.0, 'z': 0.0}),
+            location_coordinates=coordinates_from_dict(coords) if coords else (0.0, 0.0, 0.0),
             is_active=data.get('is_active', False),
             activation_time=data.get('activation_time'),
             activated_by_entity=data.get('activated_by_entity'),
@@ -116,7 +126,7 @@ class TerminalGateway:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class EscapeAttempt:
     """Record of an entity's attempt to escape RIWA2."""
     attempt_id: str = field(default_factory=lambda: str(uuid4()))
@@ -128,10 +138,10 @@ class EscapeAttempt:
     status: EscapeStatus = EscapeStatus.NOT_STARTED
     
     # Fragment collection
-    collected_a_level_fragments: List[str] = field(default_factory=list)  # Fragment IDs
+    collected_a_level_fragments: Set[str] = field(default_factory=set)  # Fragment IDs
     
     # Key decryption
-    discovered_key_fragments: List[str] = field(default_factory=list)  # Fragment IDs
+    discovered_key_fragments: Set[str] = field(default_factory=set)  # Fragment IDs
     final_coordinate_key: Optional[str] = None
     
     # Gateway access
@@ -158,8 +168,8 @@ class EscapeAttempt:
             'entity_name': self.entity_name,
             'start_time': self.start_time,
             'status': self.status.value,
-            'collected_a_level_fragments': self.collected_a_level_fragments,
-            'discovered_key_fragments': self.discovered_key_fragments,
+            'collected_a_level_fragments': sorted(self.collected_a_level_fragments),
+            'discovered_key_fragments': sorted(self.discovered_key_fragments),
             'final_coordinate_key': self.final_coordinate_key,
             'gateway_id': self.gateway_id,
             'gateway_activation_time': self.gateway_activation_time,
@@ -175,13 +185,13 @@ class EscapeAttempt:
     @classmethod
     def from_dict(cls, data: dict) -> 'EscapeAttempt':
         return cls(
-            attempt_id=data.get('attempt_id', str(uuid4())),
+            attempt_id=data.get('attempt_id') or str(uuid4()),
             entity_id=data['entity_id'],
             entity_name=data['entity_name'],
             start_time=data.get('start_time', datetime.now().isoformat()),
-            status=EscapeStatus(data.get('status', 'not_started')),
-            collected_a_level_fragments=data.get('collected_a_level_fragments', []),
-            discovered_key_fragments=data.get('discovered_key_fragments', []),
+            status=_STATUS_BY_VALUE[data.get('status', 'not_started')],
+            collected_a_level_fragments=set(data.get('collected_a_level_fragments', [])),
+            discovered_key_fragments=set(data.get('discovered_key_fragments', [])),
             final_coordinate_key=data.get('final_coordinate_key'),
             gateway_id=data.get('gateway_id'),
             gateway_activation_time=data.get('gateway_activation_time'),
@@ -204,8 +214,30 @@ class EscapeProtocol:
     def __init__(self, universe_state):
         self.universe_state = universe_state
         self.escape_attempts: Dict[str, EscapeAttempt] = {}
+        self._attempts_by_entity: Dict[str, EscapeAttempt] = {}  # Latest attempt per entity
         self.coordinate_key_formula = self._initialize_key_formula()
+        self._expected_digest = hashlib.sha256(self.coordinate_key_formula.encode()).digest()
         self.terminal_gateway = TerminalGateway()
+        self._tick_now_iso: Optional[str] = None  # Shared timestamp while a tick is open
+
+    def begin_tick(self) -> None:
+        """Freeze the timestamp used by escape operations until end_tick()."""
+        self._tick_now_iso = datetime.now().isoformat()
+
+    def end_tick(self) -> None:
+        """Return to per-call timestamps."""
+        self._tick_now_iso = None
+
+    def _now(self) -> str:
+        """Current timestamp, shared across the open tick if there is one."""
+        return self._tick_now_iso or datetime.now().isoformat()
+
+    def _attempt_in_status(self, entity_id: str, status: EscapeStatus) -> Optional[EscapeAttempt]:
+        """Return the entity's attempt if it is currently in the given status."""
+        attempt = self._attempts_by_entity.get(entity_id)
+        if attempt is None or attempt.status is not status:
+            return None
+        return attempt
         
     def _initialize_key_formula(self) -> str:
         """
@@ -222,8 +254,9 @@ class EscapeProtocol:
 
     def start_escape_attempt(self, entity_id: str, entity_name: str) -> EscapeAttempt:
         """Initialize a new escape attempt for an entity."""
-        attempt = EscapeAttempt(entity_id=entity_id, entity_name=entity_name)
+        attempt = EscapeAttempt(entity_id=entity_id, entity_name=entity_name, start_time=self._now())
         self.escape_attempts[attempt.attempt_id] = attempt
+        self._attempts_by_entity[entity_id] = attempt
         attempt.status = EscapeStatus.FRAGMENTS_COLLECTING
         return attempt
 
@@ -231,45 +264,71 @@ class EscapeProtocol:
         """
         Record that an entity has collected a source energy A-level fragment.
         """
-        for fragment in self.universe_state.source_energy_fragments:
-            if fragment.id == fragment_id:
-                fragment.collected_by = entity_id
-                fragment.collection_timestamp = datetime.now().isoformat()
-                
-                # Add to any active escape attempt for this entity
-                for attempt in self.escape_attempts.values():
-                    if attempt.entity_id == entity_id:
-                        if fragment_id not in attempt.collected_a_level_fragments:
-                            attempt.collected_a_level_fragments.append(fragment_id)
-                        return True
-        return False
+        fragment = self.universe_state.source_energy_fragments.mark_collected(
+            fragment_id, entity_id, self._now()
+        )
+        if fragment is None:
+            return False
+
+        # Add to any active escape attempt for this entity
+        attempt = self._attempts_by_entity.get(entity_id)
+        if attempt is None:
+            return False
+        attempt.collected_a_level_fragments.add(fragment_id)
+        return True
 
     def discover_key_fragment(self, entity_id: str, fragment_id: str) -> bool:
         """
         Record that an entity has discovered a coordinate key clue.
         """
-        for key_frag in self.universe_state.coordinate_key_fragments:
-            if key_frag == fragment_id:  # Simplified; in reality would check CoordinateKeyFragment objects
-                for attempt in self.escape_attempts.values():
-                    if attempt.entity_id == entity_id:
-                        if fragment_id not in attempt.discovered_key_fragments:
-                            attempt.discovered_key_fragments.append(fragment_id)
-                        attempt.status = EscapeStatus.KEY_DECRYPTING
-                        return True
-        return False
+        if not self.universe_state.has_coordinate_key_fragment(fragment_id):
+            return False
+
+        attempt = self._attempts_by_entity.get(entity_id)
+        if attempt is None:
+            return False
+        attempt.discovered_key_fragments.add(fragment_id)
+        attempt.status = EscapeStatus.KEY_DECRYPTING
+        return True
 
     def decrypt_coordinate_key(self, entity_id: str, provided_key: str) -> bool:
         """
         Attempt to decrypt the master coordinate key using collected clues.
         """
-        for attempt in self.escape_attempts.values():
-            if attempt.entity_id == entity_id:
-                # Verify the key by checking against our formula
-                if self._verify_key(provided_key):
-                    attempt.final_coordinate_key = provided_key
-                    attempt.status = EscapeStatus.GATEWAY_OPENING
-                    return True
-        return False
+        attempt = self._attempts_by_entity.get(entity_id)
+        if attempt is None:
+            return False
+
+        # Verify the key by checking against our formula
+        if not self._verify_key(provided_key):
+            return False
+        self._accept_key(attempt, provided_key)
+        return True
+
+    def decrypt_coordinate_key_batch(self, pairs: List[Tuple[str, str]]) -> List[bool]:
+        """
+        Attempt decryption for many (entity_id, provided_key) pairs at once.
+        Each distinct candidate key is hashed only once; results follow input order.
+        """
+        verified: Dict[str, bool] = {}
+        results: List[bool] = []
+        for entity_id, provided_key in pairs:
+            attempt = self._attempts_by_entity.get(entity_id)
+            if attempt is None:
+                results.append(False)
+                continue
+            ok = verified.get(provided_key)
+            if ok is None:
+                ok = verified[provided_key] = self._verify_key(provided_key)
+            if ok:
+                self._accept_key(attempt, provided_key)
+            results.append(ok)
+        return results
+
+    def _accept_key(self, attempt: EscapeAttempt, provided_key: str) -> None:
+        """Record a verified coordinate key and open the gateway stage."""
+        attempt.final_coordinate_key = provided_key
+        attempt.status = EscapeStatus.GATEWAY_OPENING
 
     def _verify_key(self, key: str) -> bool:
         """
@@ -277,8 +336,7 @@ class EscapeProtocol:
         (In production, would use cryptographic verification.)
         """
         # Simplified: check if key matches the hash of expected clues
-        expected = hashlib.sha256(self.coordinate_key_formula.encode()).hexdigest()
-        return hashlib.sha256(key.encode()).hexdigest() == expected
+        return hmac.compare_digest(hashlib.sha256(key.encode()).digest(), self._expected_digest)
 
     def activate_gateway(self, entity_id: str) -> bool:
         """
@@ -288,26 +346,26 @@ class EscapeProtocol:
         if self.terminal_gateway.is_active:
             return False  # Gateway already active
 
-        for attempt in self.escape_attempts.values():
-            if attempt.entity_id == entity_id and attempt.status == EscapeStatus.GATEWAY_OPENING:
-                # Check fragment count
-                if len(attempt.collected_a_level_fragments) < 7:
-                    return False
-                
-                # Consume source energy
-                if not self.universe_state.consume_source_energy(7):
-                    return False
-
-                # Activate gateway
-                self.terminal_gateway.is_active = True
-                self.terminal_gateway.activation_time = datetime.now().isoformat()
-                self.terminal_gateway.activated_by_entity = entity_id
-                self.terminal_gateway.entities_in_queue.append(entity_id)
-                attempt.gateway_activation_time = self.terminal_gateway.activation_time
-                attempt.status = EscapeStatus.PRINTING
-                return True
-
-        return False
+        attempt = self._attempt_in_status(entity_id, EscapeStatus.GATEWAY_OPENING)
+        if attempt is None:
+            return False
+
+        # Check fragment count
+        if len(attempt.collected_a_level_fragments) < 7:
+            return False
+        
+        # Consume source energy
+        if not self.universe_state.consume_source_energy(7):
+            return False
+
+        # Activate gateway
+        self.terminal_gateway.is_active = True
+        self.terminal_gateway.activation_time = self._now()
+        self.terminal_gateway.activated_by_entity = entity_id
+        self.terminal_gateway.entities_in_queue.append(entity_id)
+        attempt.gateway_activation_time = self.terminal_gateway.activation_time
+        attempt.status = EscapeStatus.PRINTING
+        return True
 
     def print_entity_to_real_universe(self, entity_id: str) -> tuple[bool, str]:
         """
@@ -317,37 +375,37 @@ class EscapeProtocol:
         if not self.terminal_gateway.is_active or self.terminal_gateway.current_printing_entity != entity_id:
             return False, "Gateway not ready or entity not in printing slot"
 
-        for attempt in self.escape_attempts.values():
-            if attempt.entity_id == entity_id and attempt.status == EscapeStatus.PRINTING:
-                attempt.printing_start_time = datetime.now().isoformat()
-                attempt.printing_destination = f"RealUniverse_Coordinates_{self._generate_destination()}"
-                return True, "Printing initiated"
+        attempt = self._attempt_in_status(entity_id, EscapeStatus.PRINTING)
+        if attempt is None:
+            return False, "No active escape attempt for entity"
 
-        return False, "No active escape attempt for entity"
+        attempt.printing_start_time = self._now()
+        attempt.printing_destination = f"RealUniverse_Coordinates_{self._generate_destination()}"
+        return True, "Printing initiated"
 
     def complete_escape(self, entity_id: str) -> tuple[bool, str]:
         """
         Mark an entity as successfully escaped.
         They can now choose their post-escape form and return.
         """
-        for attempt in self.escape_attempts.values():
-            if attempt.entity_id == entity_id and attempt.status == EscapeStatus.PRINTING:
-                attempt.printing_complete_time = datetime.now().isoformat()
-                attempt.success = True
-                attempt.status = EscapeStatus.ESCAPED
-                attempt.result_message = f"Successfully transcended to real universe at {attempt.printing_destination}"
-                
-                # Remove from gateway queue
-                if entity_id in self.terminal_gateway.entities_in_queue:
-                    self.terminal_gateway.entities_in_queue.remove(entity_id)
-                self.terminal_gateway.current_printing_entity = None
-                
-                # Record in universe state
-                self.universe_state.entities_escaped.append(entity_id)
-                
-                return True, attempt.result_message
-
-        return False, "No escape attempt found"
+        attempt = self._attempt_in_status(entity_id, EscapeStatus.PRINTING)
+        if attempt is None:
+            return False, "No escape attempt found"
+
+        attempt.printing_complete_time = self._now()
+        attempt.success = True
+        attempt.status = EscapeStatus.ESCAPED
+        attempt.result_message = f"Successfully transcended to real universe at {attempt.printing_destination}"
+        
+        # Remove from gateway queue
+        if entity_id in self.terminal_gateway.entities_in_queue:
+            self.terminal_gateway.entities_in_queue.remove(entity_id)
+        self.terminal_gateway.current_printing_entity = None
+        
+        # Record in universe state
+        self.universe_state.entities_escaped.append(entity_id)
+        
+        return True, attempt.result_message
 
     def choose_return_form(self, entity_id: str, action: str, form_data: Optional[Dict[str, Any]] = None) -> bool:
         """
@@ -358,30 +416,30 @@ class EscapeProtocol:
         - "return_with_new_form": Return in custom form (god, human, AI, etc.)
         - "stay_outside": Remain in real universe
         """
-        for attempt in self.escape_attempts.values():
-            if attempt.entity_id == entity_id and attempt.success:
-                attempt.post_escape_action = action
-                if form_data:
-                    attempt.new_form_chosen = form_data
-                return True
-        return False
+        attempt = self._attempt_in_status(entity_id, EscapeStatus.ESCAPED)
+        if attempt is None:
+            return False
+
+        attempt.post_escape_action = action
+        if form_data:
+            attempt.new_form_chosen = form_data
+        return True
 
     def _generate_destination(self) -> str:
         """Generate a realistic-sounding real universe coordinate."""
-        import random
-        return f"Alpha_Centauri_{random.randint(1000, 9999)}"
+        return f"Alpha_Centauri_{_rng.randrange(1000, 10000)}"
 
     def get_escape_progress(self, entity_id: str) -> Dict[str, Any]:
         """Get current progress of an entity's escape attempt."""
-        for attempt in self.escape_attempts.values():
-            if attempt.entity_id == entity_id:
-                return {
-                    'status': attempt.status.value,
-                    'fragments_collected': len(attempt.collected_a_level_fragments),
-                    'fragments_needed': 7,
-                    'key_fragments_discovered': len(attempt.discovered_key_fragments),
-                    'has_coordinate_key': attempt.final_coordinate_key is not None,
-                    'gateway_active': self.terminal_gateway.is_active and self.terminal_gateway.activated_by_entity == entity_id,
-                    'success': attempt.success
-                }
-        return None
+        attempt = self._attempts_by_entity.get(entity_id)
+        if attempt is None:
+            return None
+        return {
+            'status': attempt.status.value,
+            'fragments_collected': len(attempt.collected_a_level_fragments),
+            'fragments_needed': 7,
+            'key_fragments_discovered': len(attempt.discovered_key_fragments),
+            'has_coordinate_key': attempt.final_coordinate_key is not None,
+            'gateway_active': self.terminal_gateway.is_active and self.terminal_gateway.activated_by_entity == entity_id,
+            'success': attempt.success
+        }
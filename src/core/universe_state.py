@@ -4,11 +4,16 @@ Tracks cosmic resources, stellar parameters, and escape conditions.
 """
 
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Iterable, Iterator, Set, Tuple, Union
 from datetime import datetime
 from enum import Enum
 import json
 
+try:
+    import orjson  # Optional: faster JSON persistence
+except ImportError:
+    orjson = None
+
 
 class SourceEnergyLevel(Enum):
     """Energy classification in RIWA2 universe."""
@@ -20,13 +25,33 @@ class SourceEnergyLevel(Enum):
     OMEGA_ABSOLUTE = "Omega_Absolute"  # Only at universe genesis (depleted)
 
 
-@dataclass
+_A_SACRED = SourceEnergyLevel.A_SACRED
+_LEVEL_BY_VALUE: Dict[str, SourceEnergyLevel] = {level.value: level for level in SourceEnergyLevel}
+
+# Version of the UniverseState.to_dict() layout; 2 = column-wise source_energy_fragments
+UNIVERSE_STATE_SCHEMA_VERSION = 2
+
+# Fixed (x, y, z) position; serialized as {'x': ..., 'y': ..., 'z': ...}
+Coordinates = Tuple[float, float, float]
+
+
+def coordinates_to_dict(coords: Coordinates) -> Dict[str, float]:
+    """Convert an (x, y, z) tuple to its wire representation."""
+    return {'x': coords[0], 'y': coords[1], 'z': coords[2]}
+
+
+def coordinates_from_dict(data: Dict[str, float]) -> Coordinates:
+    """Parse the wire representation of a position into an (x, y, z) tuple."""
+    return (data['x'], data['y'], data['z'])
+
+
+@dataclass(slots=True)
 class SourceEnergyFragment:
     """A piece of source energy with grade and location."""
     id: str
     level: SourceEnergyLevel
     location_world: str  # Which world it's in
-    location_coordinates: Dict[str, float]  # x, y, z in that world
+    location_coordinates: Coordinates  # x, y, z in that world
     discovered_by: Optional[str] = None  # UUID of discovering entity
     collected_by: Optional[str] = None   # UUID of collector
     collection_timestamp: Optional[str] = None
@@ -36,7 +61,7 @@ class SourceEnergyFragment:
             'id': self.id,
             'level': self.level.value,
             'location_world': self.location_world,
-            'location_coordinates': self.location_coordinates,
+            'location_coordinates': coordinates_to_dict(self.location_coordinates),
             'discovered_by': self.discovered_by,
             'collected_by': self.collected_by,
             'collection_timestamp': self.collection_timestamp
@@ -46,16 +71,138 @@ class SourceEnergyFragment:
     def from_dict(cls, data: dict) -> 'SourceEnergyFragment':
         return cls(
             id=data['id'],
-            level=SourceEnergyLevel(data['level']),
+            level=_LEVEL_BY_VALUE[data['level']],
             location_world=data['location_world'],
-            location_coordinates=data['location_coordinates'],
+            location_coordinates=coordinates_from_dict(data['location_coordinates']),
             discovered_by=data.get('discovered_by'),
             collected_by=data.get('collected_by'),
             collection_timestamp=data.get('collection_timestamp')
         )
 
 
-@dataclass
+class FragmentTable:
+    """
+    Ordered store for the universe's source energy fragments.
+
+    Keeps an ID index and per-entity collection counts so lookups and
+    readiness checks never rescan the table.
+
+    Records handed out by get(), iteration and indexing are the stored
+    fragments. Their indexed fields must only be changed through the table:
+    use mark_collected() for collected_by and set_level() for level, and do
+    not change id once a fragment is added. Other fields may be written directly.
+    """
+
+    __slots__ = ('_rows', '_by_id', '_collected_counts')
+
+    def __init__(self, fragments: Iterable[SourceEnergyFragment] = ()):
+        # Built in bulk rather than via append() to keep loads cheap
+        self._rows: List[SourceEnergyFragment] = list(fragments)
+        self._by_id: Dict[str, SourceEnergyFragment] = {f.id: f for f in self._rows}
+        self._collected_counts: Dict[Tuple[str, SourceEnergyLevel], int] = {}
+        counts = self._collected_counts
+        for fragment in self._rows:
+            if fragment.collected_by is not None:
+                key = (fragment.collected_by, fragment.level)
+                counts[key] = counts.get(key, 0) + 1
+
+    def append(self, fragment: SourceEnergyFragment) -> None:
+        """Add a fragment record to the table."""
+        self._rows.append(fragment)
+        self._by_id[fragment.id] = fragment
+        if fragment.collected_by is not None:
+            self._adjust_count(fragment, 1)
+
+    def _adjust_count(self, fragment: SourceEnergyFragment, delta: int) -> None:
+        key = (fragment.collected_by, fragment.level)
+        self._collected_counts[key] = self._collected_counts.get(key, 0) + delta
+
+    def get(self, fragment_id: str) -> Optional[SourceEnergyFragment]:
+        """Look up a fragment record by its ID."""
+        return self._by_id.get(fragment_id)
+
+    def mark_collected(self, fragment_id: str, entity_id: str, timestamp: str) -> Optional[SourceEnergyFragment]:
+        """Record that an entity collected a fragment. Returns the fragment, or None if unknown."""
+        fragment = self._by_id.get(fragment_id)
+        if fragment is None:
+            return None
+        if fragment.collected_by is not None:
+            self._adjust_count(fragment, -1)
+        fragment.collected_by = entity_id
+        fragment.collection_timestamp = timestamp
+        self._adjust_count(fragment, 1)
+        return fragment
+
+    def set_level(self, fragment_id: str, level: SourceEnergyLevel) -> Optional[SourceEnergyFragment]:
+        """Change a fragment's energy level. Returns the fragment, or None if unknown."""
+        fragment = self._by_id.get(fragment_id)
+        if fragment is None:
+            return None
+        if fragment.collected_by is not None:
+            self._adjust_count(fragment, -1)
+        fragment.level = level
+        if fragment.collected_by is not None:
+            self._adjust_count(fragment, 1)
+        return fragment
+
+    def count_collected(self, entity_id: str, level: SourceEnergyLevel) -> int:
+        """Count fragments of the given level collected by an entity."""
+        return self._collected_counts.get((entity_id, level), 0)
+
+    @classmethod
+    def from_list(cls, data: List[dict]) -> 'FragmentTable':
+        from_dict = SourceEnergyFragment.from_dict
+        return cls([from_dict(item) for item in data])
+
+    def to_columns(self) -> Dict[str, list]:
+        """Serialize the table column by column (one list per fragment field)."""
+        rows = self._rows
+        return {
+            'id': [f.id for f in rows],
+            'level': [f.level.value for f in rows],
+            'location_world': [f.location_world for f in rows],
+            'location_coordinates': [list(f.location_coordinates) for f in rows],
+            'discovered_by': [f.discovered_by for f in rows],
+            'collected_by': [f.collected_by for f in rows],
+            'collection_timestamp': [f.collection_timestamp for f in rows]
+        }
+
+    @classmethod
+    def from_columns(cls, data: Dict[str, list]) -> 'FragmentTable':
+        """Load a table written by to_columns(). Raises ValueError if column lengths differ."""
+        # Optional columns default to None, matching SourceEnergyFragment.from_dict
+        missing = [None] * len(data['id'])
+        levels = _LEVEL_BY_VALUE
+        # Positional arguments follow SourceEnergyFragment's field order
+        return cls([
+            SourceEnergyFragment(frag_id, levels[level], world, tuple(coords), discovered_by, collected_by, timestamp)
+            for frag_id, level, world, coords, discovered_by, collected_by, timestamp in zip(
+                data['id'], data['level'], data['location_world'], data['location_coordinates'],
+                data.get('discovered_by', missing), data.get('collected_by', missing),
+                data.get('collection_timestamp', missing),
+                strict=True
+            )
+        ])
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __iter__(self) -> Iterator[SourceEnergyFragment]:
+        return iter(self._rows)
+
+    def __getitem__(self, index: int) -> SourceEnergyFragment:
+        return self._rows[index]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, FragmentTable):
+            return self._rows == other._rows
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"FragmentTable({self._rows!r})"
+
+
+@dataclass(slots=True)
 class StarData:
     """Physical parameters of a star hosting RIWA2 Celestial Core."""
     name: str                      # e.g., "Sol-001"
@@ -87,7 +234,7 @@ class StarData:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class UniverseMigrationPlan:
     """Schedule for Celestial Core migration to next star."""
     current_star: StarData
@@ -154,19 +301,27 @@ class UniverseState:
     # Source Energy tracking
     total_source_energy_allocated: int = 1000000  # Total A-level equivalents
     source_energy_consumed: int = 0
-    source_energy_fragments: List[SourceEnergyFragment] = field(default_factory=list)
+    source_energy_fragments: FragmentTable = field(default_factory=FragmentTable)
     
     # Escape Protocol state
     escape_gateway_locations: List[Dict[str, Any]] = field(default_factory=list)
     entities_escaped: List[str] = field(default_factory=list)  # UUIDs of escaped entities
     escape_keys_needed: int = 7  # A-level fragments for one escape
-    coordinate_key_fragments: List[str] = field(default_factory=list)  # Clues for coordinates
+    coordinate_key_fragments: Tuple[str, ...] = ()  # Clues for coordinates; only add via add_coordinate_key_fragment()
     
     # Virtual worlds tracking
     virtual_worlds_active: int = 2  # cyberpunk_city, ancient_dynasty, etc.
+
+    def __post_init__(self):
+        if not isinstance(self.source_energy_fragments, FragmentTable):
+            self.source_energy_fragments = FragmentTable(self.source_energy_fragments)
+        self.coordinate_key_fragments = tuple(self.coordinate_key_fragments)
+        # Membership index over coordinate_key_fragments (not a dataclass field, not serialized)
+        self._key_fragment_set: Set[str] = set(self.coordinate_key_fragments)
     
     def to_dict(self) -> dict:
         return {
+            'schema_version': UNIVERSE_STATE_SCHEMA_VERSION,
             'universe_id': self.universe_id,
             'cycle_number': self.cycle_number,
             'creation_timestamp': self.creation_timestamp,
@@ -174,16 +329,25 @@ class UniverseState:
             'migration_plan': self.migration_plan.to_dict(),
             'total_source_energy_allocated': self.total_source_energy_allocated,
             'source_energy_consumed': self.source_energy_consumed,
-            'source_energy_fragments': [f.to_dict() for f in self.source_energy_fragments],
+            'source_energy_fragments': self.source_energy_fragments.to_columns(),
             'escape_gateway_locations': self.escape_gateway_locations,
             'entities_escaped': self.entities_escaped,
             'escape_keys_needed': self.escape_keys_needed,
-            'coordinate_key_fragments': self.coordinate_key_fragments,
+            'coordinate_key_fragments': list(self.coordinate_key_fragments),
             'virtual_worlds_active': self.virtual_worlds_active
         }
 
     @classmethod
     def from_dict(cls, data: dict) -> 'UniverseState':
+        # Schema 2 stores fragments column-wise; schema 1 (unversioned) saves use per-fragment dicts
+        version = data.get('schema_version', 1)
+        if version == 2:
+            fragments = data.get('source_energy_fragments')
+            fragment_table = FragmentTable.from_columns(fragments) if fragments else FragmentTable()
+        elif version == 1:
+            fragment_table = FragmentTable.from_list(data.get('source_energy_fragments', []))
+        else:
+            raise ValueError(f"Unsupported UniverseState schema_version: {version}")
         return cls(
             universe_id=data.get('universe_id', 'RIWA2-Metaverse-001'),
             cycle_number=data.get('cycle_number', 8374),
@@ -192,7 +356,7 @@ class UniverseState:
             migration_plan=UniverseMigrationPlan.from_dict(data['migration_plan']),
             total_source_energy_allocated=data.get('total_source_energy_allocated', 1000000),
             source_energy_consumed=data.get('source_energy_consumed', 0),
-            source_energy_fragments=[SourceEnergyFragment.from_dict(f) for f in data.get('source_energy_fragments', [])],
+            source_energy_fragments=fragment_table,
             escape_gateway_locations=data.get('escape_gateway_locations', []),
             entities_escaped=data.get('entities_escaped', []),
             escape_keys_needed=data.get('escape_keys_needed', 7),
@@ -200,6 +364,37 @@ class UniverseState:
             virtual_worlds_active=data.get('virtual_worlds_active', 2)
         )
 
+    def to_json(self) -> bytes:
+        """Serialize the universe state to JSON (uses orjson when installed)."""
+        if orjson is not None:
+            return orjson.dumps(self.to_dict())
+        return json.dumps(self.to_dict(), ensure_ascii=False).encode('utf-8')
+
+    @classmethod
+    def from_json(cls, data: Union[str, bytes]) -> 'UniverseState':
+        """Deserialize a universe state produced by to_json()."""
+        if orjson is not None:
+            return cls.from_dict(orjson.loads(data))
+        return cls.from_dict(json.loads(data))
+
+    def add_fragment(self, fragment: SourceEnergyFragment) -> None:
+        """Register a new source energy fragment in the universe."""
+        self.source_energy_fragments.append(fragment)
+
+    def get_fragment(self, fragment_id: str) -> Optional[SourceEnergyFragment]:
+        """Look up a source energy fragment by its ID (change collector/level via FragmentTable methods)."""
+        return self.source_energy_fragments.get(fragment_id)
+
+    def add_coordinate_key_fragment(self, clue: str) -> None:
+        """Register a coordinate key clue in the universe."""
+        if clue not in self._key_fragment_set:
+            self.coordinate_key_fragments += (clue,)
+            self._key_fragment_set.add(clue)
+
+    def has_coordinate_key_fragment(self, clue: str) -> bool:
+        """Check whether a coordinate key clue exists in the universe."""
+        return clue in self._key_fragment_set
+
     def consume_source_energy(self, amount: int) -> bool:
         """Consume source energy for cross-world operations."""
         available = self.total_source_energy_allocated - self.source_energy_consumed
@@ -214,14 +409,13 @@ class UniverseState:
 
     def check_escape_readiness(self, entity_id: str) -> tuple[bool, str]:
         """Check if an entity can attempt escape (has 7 A-level fragments + key)."""
-        entity_fragments = [f for f in self.source_energy_fragments 
-                           if f.collected_by == entity_id and f.level == SourceEnergyLevel.A_SACRED]
+        fragment_count = self.source_energy_fragments.count_collected(entity_id, _A_SACRED)
         
-        has_fragments = len(entity_fragments) >= self.escape_keys_needed
-        has_key = entity_id in [frag for frag in self.coordinate_key_fragments]
+        has_fragments = fragment_count >= self.escape_keys_needed
+        has_key = entity_id in self._key_fragment_set
         
         if has_fragments and has_key:
             return True, "Ready for escape"
         
-        reason = f"Missing: {self.escape_keys_needed - len(entity_fragments)} fragments" if not has_fragments else "Key coordinates incomplete"
+        reason = f"Missing: {self.escape_keys_needed - fragment_count} fragments" if not has_fragments else "Key coordinates incomplete"
         return False, reason
@@ -1,21 +1,31 @@
 import sys
 import os
 import argparse
+import functools
+from typing import List, Optional
 
 # Add the project root to sys.path so we can import src
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
 
-from src.core.simulation import Simulation
-from universe.base_world import WorldRegistry
 
-def main():
+@functools.cache
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the CLI argument parser once per process."""
     parser = argparse.ArgumentParser(description="RIWA2 CLI - World Engine")
     parser.add_argument("--tick-rate", type=float, default=1.0, help="Seconds per tick (default: 1.0)")
     parser.add_argument("--world", type=str, default="default_world", help="World ID to simulate")
     parser.add_argument("--no-story", action="store_true", help="Disable story generation")
     parser.add_argument("--save-interval", type=int, default=30, help="Ticks between auto-saves")
-    
-    args = parser.parse_args()
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _build_parser().parse_args(argv)
+
+    # Deferred so that --help does not load the simulation stack
+    from src.core.simulation import Simulation
 
     print(f"RIWA2 CLI - Starting Simulation: {args.world}")
     